@@ -1,10 +1,35 @@
-import streamlit as st
-import requests
-import pandas as pd
-import numpy as np
 import time
-from datetime import datetime, timedelta
+
+# Measured from the top of the script so the first run includes imports
+_SCRIPT_START = time.perf_counter()
+
+import streamlit as st
+from datetime import datetime, timedelta, timezone
 import json
+import logging
+import math
+import os
+import threading
+from abc import ABC, abstractmethod
+
+# pandas, numpy and requests are imported where they are first needed
+# (fetching or parsing market data) so reruns that only touch the sidebar
+# or the static tabs never pay for them
+_IMPORTS_DONE = time.perf_counter()
+
+logger = logging.getLogger(__name__)
+
+# Deployment configuration (environment variables)
+# CRYPTO_REPLAY_DIR: serve recorded feeds from this directory instead of the live API
+# CRYPTO_REPLAY_SPEED: replay speed, 0 = no delay
+# CRYPTO_REPLAY_ANCHOR: ISO date/time the replay clock reports as now
+# CRYPTO_RECORD_DIR: record live API responses into this directory
+# CRYPTO_DEBUG_TIMING: set to 1 to show script timings in the sidebar
+REPLAY_DIR = os.environ.get('CRYPTO_REPLAY_DIR')
+REPLAY_SPEED = float(os.environ.get('CRYPTO_REPLAY_SPEED', '0'))
+REPLAY_ANCHOR = os.environ.get('CRYPTO_REPLAY_ANCHOR')
+RECORD_DIR = os.environ.get('CRYPTO_RECORD_DIR')
+DEBUG_TIMING = os.environ.get('CRYPTO_DEBUG_TIMING') == '1'
 
 # Page config
 st.set_page_config(
@@ -37,13 +62,134 @@ CRYPTO_PAIRS = {
     'vet-vechain': 'VET/USDT'
 }
 
-class CoinPaprikaAPI:
-    def __init__(self):
+def _iso_epoch(value):
+    """Epoch seconds of an ISO timestamp, normalising any UTC offset (naive = UTC)"""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+def _ohlcv_frame(data, coin_id):
+    """Build a compact OHLCV DataFrame from CoinPaprika-style records.
+    
+    Prices and volume are float64, timestamp is int64 epoch seconds (UTC)
+    and symbol is a single-category column, so a row costs 49 bytes; the
+    float64/int64 columns are the floor without losing price precision.
+    """
+    import numpy as np
+    import pandas as pd
+    
+    times = [row['time_open'] for row in data]
+    if all(t.endswith('Z') for t in times):
+        # Bulk-parse UTC timestamps with numpy; drop the 'Z' suffix it rejects
+        timestamps = np.array([t[:19] for t in times], dtype='datetime64[s]').astype(np.int64)
+    else:
+        # Offsets or naive values (e.g. hand-made recordings) need per-row parsing
+        timestamps = np.array([_iso_epoch(t) for t in times], dtype=np.int64)
+    
+    # Build every column first: inserting them one by one into a DataFrame
+    # costs more than extracting them from the records
+    columns = {'timestamp': timestamps}
+    for col in ('open', 'high', 'low', 'close', 'volume'):
+        columns[col] = np.array([row[col] for row in data], dtype=np.float64)
+    
+    columns['symbol'] = pd.Categorical.from_codes(
+        np.zeros(len(data), dtype=np.int8), [CRYPTO_PAIRS.get(coin_id, coin_id)])
+    return pd.DataFrame(columns)
+
+def _ticker_prices(data, coin_ids):
+    """Extract price snapshots for the requested coins from a tickers payload"""
+    prices = {}
+    for coin in data:
+        if coin['id'] in coin_ids:
+            prices[coin['id']] = {
+                'price': coin['quotes']['USD']['price'],
+                'change_24h': coin['quotes']['USD']['percent_change_24h'],
+                'volume_24h': coin['quotes']['USD']['volume_24h']
+            }
+    return prices
+
+def _day_start_epoch(date):
+    """Epoch seconds of 00:00 UTC on the calendar day of date"""
+    return int(datetime(date.year, date.month, date.day, tzinfo=timezone.utc).timestamp())
+
+class MarketDataProvider(ABC):
+    """Interface for OHLCV history and ticker snapshot sources"""
+    
+    # Seconds to wait between per-coin requests during a scan
+    request_delay = 0.0
+    
+    def now(self):
+        """Current time as seen by this source, used to build scan windows"""
+        return datetime.now()
+    
+    @abstractmethod
+    def get_coin_ohlcv(self, coin_id, start_date, end_date):
+        """Return an OHLCV DataFrame for coin_id, or None if unavailable"""
+    
+    @abstractmethod
+    def get_current_prices(self, coin_ids):
+        """Return {coin_id: {'price', 'change_24h', 'volume_24h'}} for coin_ids"""
+
+class CoinPaprikaAPI(MarketDataProvider):
+    """Live CoinPaprika API client.
+    
+    With record_dir set, every successful response is also written there in
+    the layout ReplayDataProvider reads. OHLCV recordings are merged by
+    candle so repeated scans extend the recorded history.
+    
+    One instance is shared by all sessions (see get_data_provider), so each
+    thread gets its own requests.Session and recording writes are locked.
+    """
+    
+    # Rate limiting - slower for more reliable results
+    request_delay = 0.8
+    
+    def __init__(self, record_dir=None):
         self.base_url = "https://api.coinpaprika.com/v1"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'CryptoSignals/1.0'
-        })
+        self.record_dir = record_dir
+        self._local = threading.local()
+        self._record_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """HTTP session for the calling thread (requests.Session is not thread-safe)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            
+            session = requests.Session()
+            session.headers.update({
+                'User-Agent': 'CryptoSignals/1.0'
+            })
+            self._local.session = session
+        return session
+    
+    def _record(self, relative_path, data, merge=False):
+        """Write a raw response under record_dir, optionally merging candles.
+        
+        Recording is a side channel: failures are logged and never affect
+        the data returned to the caller.
+        """
+        path = os.path.join(self.record_dir, relative_path)
+        
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            
+            with self._record_lock:
+                if merge and os.path.exists(path):
+                    with open(path) as f:
+                        candles = {row['time_open']: row for row in json.load(f)}
+                    candles.update((row['time_open'], row) for row in data)
+                    data = [candles[key] for key in sorted(candles)]
+                
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, path)
+        
+        except Exception as e:
+            logger.warning("Could not record %s: %s", path, e)
     
     def get_coin_ohlcv(self, coin_id, start_date, end_date):
         """Get OHLCV data from CoinPaprika API"""
@@ -60,18 +206,10 @@ class CoinPaprikaAPI:
                 data = response.json()
                 
                 if data:
-                    df = pd.DataFrame(data)
-                    df['time_open'] = pd.to_datetime(df['time_open'])
-                    df['time_close'] = pd.to_datetime(df['time_close'])
-                    
-                    # Rename columns to standard format
-                    df = df.rename(columns={
-                        'time_open': 'timestamp',
-                        'volume': 'volume'
-                    })
-                    
-                    df['symbol'] = CRYPTO_PAIRS.get(coin_id, coin_id)
-                    return df[['timestamp', 'open', 'high', 'low', 'close', 'volume', 'symbol']]
+                    df = _ohlcv_frame(data, coin_id)
+                    if self.record_dir:
+                        self._record(os.path.join('ohlcv', f"{coin_id}.json"), data, merge=True)
+                    return df
                 
             return None
             
@@ -89,16 +227,9 @@ class CoinPaprikaAPI:
             
             if response.status_code == 200:
                 data = response.json()
-                
-                prices = {}
-                for coin in data:
-                    if coin['id'] in coin_ids:
-                        prices[coin['id']] = {
-                            'price': coin['quotes']['USD']['price'],
-                            'change_24h': coin['quotes']['USD']['percent_change_24h'],
-                            'volume_24h': coin['quotes']['USD']['volume_24h']
-                        }
-                
+                prices = _ticker_prices(data, coin_ids)
+                if self.record_dir:
+                    self._record('tickers.json', data)
                 return prices
             
             return {}
@@ -107,11 +238,132 @@ class CoinPaprikaAPI:
             st.error(f"Error fetching current prices: {str(e)}")
             return {}
 
+class ReplayDataProvider(MarketDataProvider):
+    """Replay recorded CoinPaprika responses from local files.
+    
+    Expected layout under data_dir (as written by CoinPaprikaAPI(record_dir=...)):
+        ohlcv/<coin_id>.json  - response of /coins/<coin_id>/ohlcv/historical
+        tickers.json          - response of /tickers?quotes=USD
+    
+    The replay clock (now()) is anchor if given, otherwise the last recorded
+    candle, so scan windows do not depend on the wall clock.
+    
+    speed scales both the scan pacing relative to the live API and the candle
+    timing in play() relative to real time: 1 is live speed, 100 a hundred
+    times faster, 0 without any delay.
+    """
+    
+    def __init__(self, data_dir, speed=0, anchor=None):
+        self.data_dir = data_dir
+        self.speed = speed
+        self.anchor = anchor
+        self.request_delay = CoinPaprikaAPI.request_delay / speed if speed else 0.0
+        self._frames = {}
+        self._tickers = None
+    
+    def _load(self, relative_path):
+        """Load a recorded JSON payload, None if missing"""
+        path = os.path.join(self.data_dir, relative_path)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+    
+    def _frame(self, coin_id):
+        """Full recorded history for coin_id; only found recordings are memoized"""
+        if coin_id not in self._frames:
+            data = self._load(os.path.join('ohlcv', f"{coin_id}.json"))
+            if not data:
+                return None
+            self._frames[coin_id] = _ohlcv_frame(data, coin_id)
+        return self._frames[coin_id]
+    
+    def now(self):
+        """Replay clock: the anchor, or the latest candle across all recordings"""
+        if self.anchor is not None:
+            return self.anchor
+        
+        latest = None
+        ohlcv_dir = os.path.join(self.data_dir, 'ohlcv')
+        if os.path.isdir(ohlcv_dir):
+            for name in os.listdir(ohlcv_dir):
+                if name.endswith('.json'):
+                    df = self._frame(name[:-len('.json')])
+                    if df is not None:
+                        last = int(df['timestamp'].max())
+                        latest = last if latest is None else max(latest, last)
+        
+        if latest is None:
+            return super().now()
+        return datetime.fromtimestamp(latest, tz=timezone.utc).replace(tzinfo=None)
+    
+    def get_coin_ohlcv(self, coin_id, start_date, end_date):
+        """Get recorded OHLCV data for the days start_date..end_date (UTC)"""
+        try:
+            df = self._frame(coin_id)
+            
+            if df is not None:
+                start = _day_start_epoch(start_date)
+                end = _day_start_epoch(end_date + timedelta(days=1))
+                df = df[(df['timestamp'] >= start) & (df['timestamp'] < end)].reset_index(drop=True)
+                
+                if len(df):
+                    return df
+            
+            return None
+            
+        except Exception as e:
+            st.error(f"Error replaying {coin_id}: {str(e)}")
+            return None
+    
+    def get_current_prices(self, coin_ids):
+        """Get recorded prices for multiple coins"""
+        try:
+            if self._tickers is None:
+                self._tickers = self._load('tickers.json')
+            return _ticker_prices(self._tickers, coin_ids) if self._tickers else {}
+            
+        except Exception as e:
+            st.error(f"Error replaying current prices: {str(e)}")
+            return {}
+    
+    def play(self, coin_ids, start_date=None, end_date=None, window=None):
+        """Play recorded candles back in time order across coins.
+        
+        Yields (coin_id, frame) once per candle, where frame holds that coin's
+        history up to and including the candle (only the last window rows if
+        window is set). With speed set, sleeps the real gap between candles
+        divided by speed.
+        """
+        frames = {}
+        for coin_id in coin_ids:
+            if start_date is None or end_date is None:
+                df = self._frame(coin_id)
+            else:
+                df = self.get_coin_ohlcv(coin_id, start_date, end_date)
+            if df is not None:
+                frames[coin_id] = df
+        
+        events = sorted(
+            (ts, coin_id, i)
+            for coin_id, df in frames.items()
+            for i, ts in enumerate(df['timestamp'].tolist())
+        )
+        
+        previous = None
+        for ts, coin_id, i in events:
+            if self.speed and previous is not None and ts > previous:
+                time.sleep((ts - previous) / self.speed)
+            previous = ts
+            
+            first = 0 if window is None else max(0, i + 1 - window)
+            yield coin_id, frames[coin_id].iloc[first:i + 1]
+
 class RealTradingSignals:
-    def __init__(self, bb_period=20, bb_std=2.0):
+    def __init__(self, bb_period=20, bb_std=2.0, api=None):
         self.bb_period = bb_period
         self.bb_std = bb_std
-        self.api = CoinPaprikaAPI()
+        self.api = api if api is not None else CoinPaprikaAPI()
     
     def calculate_bollinger_bands(self, df):
         """Calculate Bollinger Bands"""
@@ -127,19 +379,27 @@ class RealTradingSignals:
     
     def detect_bb_signal(self, df):
         """Detect Bollinger Bands reversal signal"""
-        if len(df) < 2:
+        if len(df) < max(2, self.bb_period):
             return None
-            
-        df = self.calculate_bollinger_bands(df)
         
-        if df['bb_upper'].isna().all():
-            return None
-            
-        latest = df.iloc[-1]
-        previous = df.iloc[-2]
+        # Only the latest candle's bands matter, so compute them from the
+        # last bb_period closes instead of the full rolling series
+        closes = df['close'].to_numpy()[-self.bb_period:]
+        sma = closes.mean()
+        bb_std = closes.std(ddof=1)
+        
+        latest = {
+            'open': df['open'].iat[-1],
+            'high': df['high'].iat[-1],
+            'close': closes[-1],
+            'volume': df['volume'].iat[-1],
+            'sma': sma
+        }
+        latest['bb_upper'] = sma + (bb_std * self.bb_std)
+        latest['bb_lower'] = sma - (bb_std * self.bb_std)
         
         # Skip if BB values are NaN
-        if pd.isna(latest['bb_upper']) or pd.isna(latest['sma']):
+        if math.isnan(latest['bb_upper']) or math.isnan(latest['sma']):
             return None
         
         # Signal conditions for SHORT entry
@@ -178,8 +438,8 @@ class RealTradingSignals:
             rr_ratio_2 = abs(reward_2 / risk_amount) if risk_amount != 0 else 0
             
             return {
-                'symbol': latest['symbol'],
-                'timestamp': latest['timestamp'],
+                'symbol': df['symbol'].iat[-1],
+                'timestamp': datetime.fromtimestamp(int(df['timestamp'].iat[-1]), tz=timezone.utc),
                 'signal_type': 'SHORT',
                 'entry_price': round(entry_price, 6),
                 'bb_upper': round(latest['bb_upper'], 6),
@@ -203,19 +463,30 @@ class RealTradingSignals:
         
         return None
     
+    def detect_signals(self, frames):
+        """Detect signals over (coin_id, df) pairs without any UI output"""
+        signals = []
+        for coin_id, df in frames:
+            if df is not None and len(df) >= self.bb_period:
+                signal = self.detect_bb_signal(df)
+                if signal:
+                    signals.append(signal)
+        return signals
+    
     def scan_for_signals(self, coin_ids):
         """Scan multiple coins for trading signals"""
         signals = []
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        end_date = datetime.now()
+        end_date = self.api.now()
         start_date = end_date - timedelta(days=30)  # Get 30 days of data
         
         # Show total count
         total_coins = len(coin_ids)
         status_text.text(f"Starting scan of {total_coins} cryptocurrencies...")
-        time.sleep(1)
+        if self.api.request_delay:
+            time.sleep(1)
         
         for i, coin_id in enumerate(coin_ids):
             symbol = CRYPTO_PAIRS.get(coin_id, coin_id)
@@ -236,19 +507,21 @@ class RealTradingSignals:
             except Exception as e:
                 st.error(f"❌ Error scanning {symbol}: {str(e)}")
             
-            # Adaptive rate limiting - slower for more reliable results
-            time.sleep(0.8)  # Increased delay to ensure all pairs are scanned
+            # Provider-specific pacing (live API rate limit or replay speed)
+            if self.api.request_delay:
+                time.sleep(self.api.request_delay)
         
         progress_bar.empty()
         status_text.text(f"✅ Scan completed! Analyzed {total_coins} pairs, found {len(signals)} signals.")
-        time.sleep(2)
+        if self.api.request_delay:
+            time.sleep(2)
         status_text.empty()
         
         return signals
 
 def create_simple_chart_display(coin_id, trading_signals):
     """Create a simple text-based chart analysis"""
-    end_date = datetime.now()
+    end_date = trading_signals.api.now()
     start_date = end_date - timedelta(days=7)  # Last 7 days
     
     df = trading_signals.api.get_coin_ohlcv(coin_id, start_date, end_date)
@@ -275,6 +548,26 @@ def create_simple_chart_display(coin_id, trading_signals):
     
     return chart_data
 
+@st.cache_resource
+def get_data_provider():
+    """Create the configured market data provider once per process"""
+    if REPLAY_DIR:
+        anchor = datetime.fromisoformat(REPLAY_ANCHOR) if REPLAY_ANCHOR else None
+        return ReplayDataProvider(REPLAY_DIR, speed=REPLAY_SPEED, anchor=anchor)
+    return CoinPaprikaAPI(record_dir=RECORD_DIR)
+
+@st.cache_resource(max_entries=32, ttl=3600)
+def get_trading_signals(bb_period, bb_std):
+    """Create the signal engine once per BB parameters"""
+    return RealTradingSignals(bb_period=bb_period, bb_std=bb_std, api=get_data_provider())
+
+@st.cache_resource
+def get_coin_index():
+    """Build the multiselect labels and their label <-> coin id mappings"""
+    id_to_label = {coin_id: f"{symbol} ({coin_id})" for coin_id, symbol in CRYPTO_PAIRS.items()}
+    label_to_id = {label: coin_id for coin_id, label in id_to_label.items()}
+    return list(id_to_label.values()), id_to_label, label_to_id
+
 def main():
     st.title("🔥 Real Crypto Trading Signals")
     st.markdown("**Professional Bollinger Bands signals using CoinPaprika API - No restrictions!**")
@@ -306,6 +599,17 @@ def main():
         
         st.divider()
         
+        # Data source (set by deployment configuration)
+        api = get_data_provider()
+        st.markdown("**🌐 Data Source:**")
+        
+        if isinstance(api, ReplayDataProvider):
+            st.info(f"Replaying recorded feeds from `{api.data_dir}`\n✅ Offline\n✅ Deterministic")
+        else:
+            st.info("CoinPaprika API\n✅ No restrictions\n✅ 20,000 calls/month\n✅ Real market data")
+        
+        st.divider()
+        
         # Coin selection
         st.subheader("📊 Select Cryptocurrencies")
         
@@ -322,20 +626,15 @@ def main():
         if 'selected_coins' not in st.session_state:
             st.session_state.selected_coins = list(CRYPTO_PAIRS.keys())[:10]
         
-        coin_names = [f"{CRYPTO_PAIRS[coin_id]} ({coin_id})" for coin_id in CRYPTO_PAIRS.keys()]
+        coin_names, id_to_label, label_to_id = get_coin_index()
         selected_names = st.multiselect(
             "Choose coins to analyze:",
             coin_names,
-            default=[f"{CRYPTO_PAIRS[coin_id]} ({coin_id})" for coin_id in st.session_state.selected_coins]
+            default=[id_to_label[coin_id] for coin_id in st.session_state.selected_coins]
         )
         
         # Convert back to coin IDs
-        selected_coins = []
-        for name in selected_names:
-            for coin_id in CRYPTO_PAIRS.keys():
-                if coin_id in name:
-                    selected_coins.append(coin_id)
-                    break
+        selected_coins = [label_to_id[name] for name in selected_names]
         
         if not selected_coins:
             selected_coins = list(CRYPTO_PAIRS.keys())[:10]
@@ -345,16 +644,15 @@ def main():
         
         # Show selection count with warning for large selections
         if len(selected_coins) > 15:
-            st.warning(f"⚠️ {len(selected_coins)} coins selected - Will take ~{len(selected_coins)*0.8/60:.1f} minutes to scan")
+            st.warning(f"⚠️ {len(selected_coins)} coins selected - Will take ~{len(selected_coins)*api.request_delay/60:.1f} minutes to scan")
         else:
-            st.success(f"✅ {len(selected_coins)} coins selected - Scan time: ~{len(selected_coins)*0.8/60:.1f} minutes")
-        
-        st.divider()
-        st.markdown("**🌐 Data Source:**")
-        st.info("CoinPaprika API\n✅ No restrictions\n✅ 20,000 calls/month\n✅ Real market data")
+            st.success(f"✅ {len(selected_coins)} coins selected - Scan time: ~{len(selected_coins)*api.request_delay/60:.1f} minutes")
     
     # Initialize trading system
-    trading_signals = RealTradingSignals(bb_period=bb_period, bb_std=bb_std)
+    trading_signals = get_trading_signals(bb_period, bb_std)
+    
+    # Per-interaction overhead: everything before the tabs run any actions
+    setup_ms = (time.perf_counter() - _SCRIPT_START) * 1000
     
     # Main tabs
     tab1, tab2, tab3, tab4 = st.tabs(["🚨 Signal Scanner", "📊 Live Prices", "📈 Chart Analysis", "📚 Strategy Guide"])
@@ -367,7 +665,7 @@ def main():
         with col1:
             # Warning for large scans
             if len(selected_coins) > 10:
-                st.warning(f"⚠️ Large scan selected ({len(selected_coins)} pairs). This will take approximately {len(selected_coins)*0.8/60:.1f} minutes.")
+                st.warning(f"⚠️ Large scan selected ({len(selected_coins)} pairs). This will take approximately {len(selected_coins)*api.request_delay/60:.1f} minutes.")
             
             if st.button("🔍 SCAN FOR TRADING SIGNALS", type="primary", use_container_width=True):
                 with st.spinner(f"Analyzing {len(selected_coins)} cryptocurrencies for BB reversal signals..."):
@@ -504,8 +802,7 @@ def main():
                         'Last Update': datetime.now().strftime('%H:%M:%S')
                     })
                 
-                df_prices = pd.DataFrame(price_data)
-                st.dataframe(df_prices, use_container_width=True, hide_index=True)
+                st.dataframe(price_data, use_container_width=True, hide_index=True)
                 
                 st.success("✅ Market data updated successfully!")
                 
@@ -716,6 +1013,12 @@ def main():
         
         **Remember**: This app uses real market data from CoinPaprika API and provides genuine trading signals. Always practice proper risk management!
         """)
+    
+    imports_ms = (_IMPORTS_DONE - _SCRIPT_START) * 1000
+    total_ms = (time.perf_counter() - _SCRIPT_START) * 1000
+    logger.debug("Script run: imports %.1f ms, setup %.1f ms, total %.1f ms", imports_ms, setup_ms, total_ms)
+    if DEBUG_TIMING:
+        st.sidebar.caption(f"⏱️ Imports {imports_ms:.1f} ms / setup {setup_ms:.1f} ms / total {total_ms:.1f} ms")
 
 if __name__ == "__main__":
     main()
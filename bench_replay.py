@@ -0,0 +1,128 @@
+"""Offline replay check and detection benchmark.
+
+Run from the repository root:
+
+    python bench_replay.py [--coins 20] [--candles 500]
+
+1. Replays recordings/sample and checks that exactly one BTC/USDT signal is
+   found, on the 2026-09-09 candle.
+2. Checks detect_bb_signal against the full rolling-series bands from
+   calculate_bollinger_bands on every replayed frame.
+3. Times ReplayDataProvider.play() + detect_signals() over a synthetic
+   recording of --coins x --candles hourly candles.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import app
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings', 'sample')
+
+def reference_signal(trading_signals, df):
+    """Signal decision and bands for the latest candle from the rolling series"""
+    latest = trading_signals.calculate_bollinger_bands(df).iloc[-1]
+    is_signal = (latest['close'] < latest['open']
+                 and latest['high'] >= latest['bb_upper']
+                 and latest['close'] < latest['bb_upper']
+                 and latest['volume'] > 0)
+    return is_signal, latest
+
+def check_against_reference(trading_signals, frames):
+    """Assert detect_bb_signal agrees with the rolling-series bands, return frame count"""
+    checked = 0
+    for coin_id, df in frames:
+        if len(df) < trading_signals.bb_period:
+            continue
+        signal = trading_signals.detect_bb_signal(df)
+        is_signal, latest = reference_signal(trading_signals, df)
+        assert (signal is not None) == bool(is_signal), f"{coin_id} @ {len(df)}: decision differs"
+        if signal:
+            for key, column in (('bb_upper', 'bb_upper'), ('bb_middle', 'sma'), ('bb_lower', 'bb_lower')):
+                assert signal[key] == round(latest[column], 6), f"{coin_id} @ {len(df)}: {key} differs"
+        checked += 1
+    return checked
+
+def check_sample():
+    """Replay recordings/sample and check the known BTC signal"""
+    provider = app.ReplayDataProvider(SAMPLE_DIR)
+    trading_signals = app.RealTradingSignals(api=provider)
+
+    end_date = provider.now()
+    start_date = end_date - timedelta(days=30)
+    coin_ids = list(app.CRYPTO_PAIRS)
+    frames = [(coin_id, provider.get_coin_ohlcv(coin_id, start_date, end_date)) for coin_id in coin_ids]
+    signals = trading_signals.detect_signals(frames)
+
+    assert [s['symbol'] for s in signals] == ['BTC/USDT'], signals
+    assert signals[0]['timestamp'] == datetime(2026, 9, 9, tzinfo=timezone.utc), signals[0]['timestamp']
+
+    checked = check_against_reference(trading_signals, provider.play(coin_ids))
+    print(f"sample: 1 BTC/USDT signal at 2026-09-09, {checked} frames match the rolling-series bands")
+
+def write_synthetic_feed(data_dir, coin_ids, candles, seed=26):
+    """Write a random-walk hourly recording in the replay layout"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    os.makedirs(os.path.join(data_dir, 'ohlcv'))
+
+    for coin_id in coin_ids:
+        price = rng.uniform(1, 1000)
+        rows = []
+        for i in range(candles):
+            open_ = price
+            close = price * (1 + rng.uniform(-0.03, 0.03))
+            rows.append({
+                'time_open': (start + timedelta(hours=i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'time_close': (start + timedelta(hours=i, minutes=59, seconds=59)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'open': open_,
+                'high': max(open_, close) * (1 + rng.uniform(0, 0.02)),
+                'low': min(open_, close) * (1 - rng.uniform(0, 0.02)),
+                'close': close,
+                'volume': rng.uniform(1e5, 1e7),
+                'market_cap': 0
+            })
+            price = close
+
+        with open(os.path.join(data_dir, 'ohlcv', f"{coin_id}.json"), 'w') as f:
+            json.dump(rows, f)
+
+def benchmark(coins, candles):
+    """Time candle playback plus detection over a synthetic recording"""
+    coin_ids = list(app.CRYPTO_PAIRS)[:coins]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'feed')
+        write_synthetic_feed(data_dir, coin_ids, candles)
+        provider = app.ReplayDataProvider(data_dir)
+        trading_signals = app.RealTradingSignals(api=provider)
+
+        checked = check_against_reference(trading_signals, provider.play(coin_ids[:2]))
+        print(f"synthetic: {checked} frames match the rolling-series bands")
+
+        start = time.perf_counter()
+        count = 0
+        found = 0
+        for coin_id, df in provider.play(coin_ids, window=trading_signals.bb_period + 10):
+            count += 1
+            found += len(trading_signals.detect_signals([(coin_id, df)]))
+        elapsed = time.perf_counter() - start
+
+    print(f"benchmark: {count} candles ({coins} coins x {candles}) in {elapsed:.2f}s "
+          f"= {count / elapsed:,.0f} candles/s, {found} signals")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--coins', type=int, default=20)
+    parser.add_argument('--candles', type=int, default=500)
+    args = parser.parse_args()
+
+    check_sample()
+    benchmark(args.coins, args.candles)
+
+if __name__ == "__main__":
+    main()